@@ -31,293 +31,267 @@
 #
 #******************************************************************************
 
+import os
 import random
-import itertools
 
 import cocotb
-from cocotb.clock import Clock
 from cocotb.utils import get_sim_time
-from cocotb.triggers import FallingEdge, RisingEdge, Timer, Event
+from cocotb.triggers import FallingEdge, RisingEdge, ReadOnly, ClockCycles, Timer
 from cocotb.binary import BinaryValue
 from cocotbext.axi import (AxiStreamBus, AxiStreamSource, AxiStreamSink, AxiStreamMonitor, AxiStreamFrame)
 from cocotbext.mil_std_1553 import MILSTD1553Source, MILSTD1553Sink
 
+# Variable: _DATA
+# Precomputed little endian 2 byte values for 0 to 255, indexed by the test loops.
+_DATA = tuple(x.to_bytes(length = 2, byteorder='little') for x in range(0, 2**8))
+
+# Variable: _COUNT
+# Number of values each increment test sends. All 256 when FULL_REGRESSION is set to
+# anything other than empty or 0, otherwise a random sample of 16 (seeded by cocotb RANDOM_SEED).
+_COUNT = 2**8 if os.environ.get('FULL_REGRESSION', '0') not in ('', '0') else 16
+
+# Variable: _s_bus
+# Slave AXIS bus, built from the dut on first use and reused by later tests.
+_s_bus = None
+
+# Variable: _m_bus
+# Master AXIS bus, built from the dut on first use and reused by later tests.
+_m_bus = None
+
 # Function: random_bool
-# Return a infinte cycle of random bools
+# Return an infinite generator of random bits. The bits are yielded as ints (0 or 1),
+# not bools. Each 64 bit xorshift step supplies the next 64 bits.
+#
+# Parameters:
+#   seed - Starting state of the xorshift, masked to 64 bits and must not be 0.
+#          Default is drawn from random, so it follows cocotb RANDOM_SEED.
 #
-# Returns: List
-def random_bool():
-  temp = []
+# Returns: Generator
+def random_bool(seed = None):
+  if seed is None:
+    seed = random.getrandbits(64) or 1
 
-  for x in range(0, 256):
-    temp.append(bool(random.getrandbits(1)))
+  s = seed & 0xFFFFFFFFFFFFFFFF
 
-  return itertools.cycle(temp)
+  if s == 0:
+    raise ValueError("random_bool seed must be non zero in the lower 64 bits")
+
+  while True:
+    s ^= (s << 13) & 0xFFFFFFFFFFFFFFFF
+    s ^= s >> 7
+    s ^= (s << 17) & 0xFFFFFFFFFFFFFFFF
+
+    for i in range(0, 64):
+      yield (s >> i) & 1
 
 # Function: start_clock
-# Start the simulation clock generator.
+# Enable the simulation clock generator in the verilog wrapper.
 #
 # Parameters:
 #   dut - Device under test passed from cocotb test function
+#
+# Returns: Clock period in ns, truncated to an integer. This is approximate, the verilog
+#          wrapper toggles on a real half period rounded to the 100 ps precision, so they
+#          differ when CLOCK_SPEED does not divide 1 GHz evenly (3 MHz for example).
 def start_clock(dut):
-  dut._log.info(f'CLOCK NS : {int(1000000000/dut.CLOCK_SPEED.value)}')
-  cocotb.start_soon(Clock(dut.aclk, int(1000000000/dut.CLOCK_SPEED.value), units="ns").start())
+  period = 1000000000 // int(dut.CLOCK_SPEED.value)
+
+  dut._log.info(f'CLOCK NS : {period}')
+  dut.aclk_en.value = 1
+
+  return period
 
 # Function: reset_dut
 # Cocotb coroutine for resets, used with await to make sure system is reset.
-async def reset_dut(dut):
+# Reset is held for about 200 ns worth of aclk cycles, at least one cycle.
+#
+# Parameters:
+#   dut    - Device under test passed from cocotb test function
+#   period - Approximate clock period in ns returned by start_clock
+async def reset_dut(dut, period):
   dut.arstn.value = 0
-  await Timer(200, units="ns")
+  await ClockCycles(dut.aclk, max(1, 200 // period))
   dut.arstn.value = 1
 
-# Function: increment test tx
-# Coroutine that is identified as a test routine. This routine tests by sending a incrementing value
-# as a command and then as data, no delay between the two is inserted by the core.
+# Function: _run_increment
+# Shared body of the increment tests. Sends _COUNT values, in increasing order, as a command and then as data,
+# in the direction selected by tx. With delay set a 4us or more gap is expected between the two.
 #
 # Parameters:
-#   dut - Device under test passed from cocotb.
-@cocotb.test()
-async def increment_test_tx(dut):
+#   dut   - Device under test passed from cocotb.
+#   tx    - True for AXIS to 1553, False for 1553 to AXIS.
+#   delay - True to test the 4us delay between command and data.
+async def _run_increment(dut, *, tx, delay):
+    global _s_bus, _m_bus
 
-    start_clock(dut)
+    period = start_clock(dut)
 
-    axis_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, "s_axis"), dut.aclk, dut.arstn, False)
+    if tx:
+        _s_bus = _s_bus or AxiStreamBus.from_prefix(dut, "s_axis")
 
-    milstd1553_sink = MILSTD1553Sink(dut.tx_diff, dut.arstn)
-    
-    dut.rx_diff.value = 0
-    
-    dut.rx_hold_en.value = 0
-    
-    await reset_dut(dut)
+        axis_source = AxiStreamSource(_s_bus, dut.aclk, dut.arstn, False)
 
-    for x in range(0, 2**8):
-        data = x.to_bytes(length = 2, byteorder='little')
+        milstd1553_sink = MILSTD1553Sink(dut.tx_diff, dut.arstn)
 
-        tx_frame = AxiStreamFrame(data, tuser=0x4, tx_complete=Event())
+        tx_active = dut.tx_active
 
-        await axis_source.send(tx_frame)
+        tx_active_edge = RisingEdge(tx_active)
 
-        await RisingEdge(dut.tx_active)
+        tready = dut.s_axis_tready
 
-        assert dut.tx_active.value.integer == 1, "Output is not enabled"
+        dut.rx_diff.value = 0
 
-        rx_data = await milstd1553_sink.read_cmd()
+        dut.rx_hold_en.value = 0
+    else:
+        _m_bus = _m_bus or AxiStreamBus.from_prefix(dut, "m_axis")
 
-        assert tx_frame.tdata == rx_data, "Input data does not match output"
-        
-        tx_frame = AxiStreamFrame(data, tuser=0x2, tx_complete=Event())
-        
-        await axis_source.send(tx_frame)
-        
-        await RisingEdge(dut.tx_active)
-        
-        assert dut.tx_active.value.integer == 1, "Output is not enabled"
-        
-        rx_data = await milstd1553_sink.read_data()
-        
-        assert tx_frame.tdata == rx_data, "Input data does not match output"
+        axis_sink = AxiStreamSink(_m_bus, dut.aclk, dut.arstn, False)
 
+        milstd1553_source = MILSTD1553Source(dut.rx_diff, dut.arstn)
 
-    await RisingEdge(dut.aclk)
+        dut.rx_hold_en.value = 1
 
-    assert dut.s_axis_tready.value.integer == 1, "Input is not ready"
+    await reset_dut(dut, period)
 
-# Function: increment test rx
-# Coroutine that is identified as a test routine. This routine tests by sending a incrementing value
-# as a command and then as data.
-#
-# Parameters:
-#   dut - Device under test passed from cocotb.
-@cocotb.test()
-async def increment_test_rx(dut):
-
-    start_clock(dut)
-
-    axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "m_axis"), dut.aclk, dut.arstn, False)
+    if _COUNT >= 2**8:
+        values = range(0, 2**8)
+    else:
+        values = sorted(random.sample(range(0, 2**8), _COUNT))
 
-    milstd1553_source = MILSTD1553Source(dut.rx_diff, dut.arstn)
-    
-    dut.rx_hold_en.value = 1
+    for x in values:
+        data = _DATA[x]
 
-    await reset_dut(dut)
+        if tx:
+            tx_frame = AxiStreamFrame(data, tuser=0x4)
 
-    for x in range(0, 2**8):
-        data = x.to_bytes(length = 2, byteorder='little')
+            if delay:
+                await Timer(10, units="us")
 
-        await milstd1553_source.write_cmd(data)
+            await axis_source.send(tx_frame)
 
-        rx_frame = await axis_sink.recv()
+            await tx_active_edge
 
-        assert rx_frame.tdata == data, "Input data does not match output"
+            await ReadOnly()
 
-        user_data = "{:05b}".format(rx_frame.tuser)
+            assert int(tx_active.value) == 1, "Output is not enabled"
 
-        assert user_data[2:] == "100", "Wrong Sync"
-        
-        assert user_data[1] == "0", "4us Delay"
+            rx_data = await milstd1553_sink.read_cmd()
 
-        await milstd1553_source.write_data(data)
+            assert tx_frame.tdata == rx_data, "Input data does not match output"
 
-        rx_frame = await axis_sink.recv()
+            tx_frame = AxiStreamFrame(data, tuser=(0xA if delay else 0x2))
 
-        assert rx_frame.tdata == data, "Input data does not match output"
+            await axis_source.send(tx_frame)
 
-        user_data = "{:05b}".format(rx_frame.tuser)
+            start_time = get_sim_time("ps")
 
-        assert user_data[2:] == "010", "Wrong Sync"
-        
-        assert user_data[1] == "0", "4us Delay"
+            await tx_active_edge
 
+            if delay:
+                delay_time = get_sim_time("ps") - start_time
 
-    await RisingEdge(dut.aclk)
+                assert delay_time >= 4000000, "Delay less then 4 us"
 
-    assert milstd1553_source.empty(), "Buffer NOT empty"
-
-# Function: increment test tx delay
-# Coroutine that is identified as a test routine. This routine tests by sending a incrementing value
-# as a command and then as data, delay between the two is inserted by the core.
-#
-# Parameters:
-#   dut - Device under test passed from cocotb.
-@cocotb.test()
-async def increment_test_tx_delay(dut):
+            await ReadOnly()
 
-    start_clock(dut)
+            assert int(tx_active.value) == 1, "Output is not enabled"
 
-    axis_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, "s_axis"), dut.aclk, dut.arstn, False)
+            rx_data = await milstd1553_sink.read_data()
 
-    milstd1553_sink = MILSTD1553Sink(dut.tx_diff, dut.arstn)
+            assert tx_frame.tdata == rx_data, "Input data does not match output"
 
-    dut.rx_diff.value = 0
-    
-    dut.rx_hold_en.value = 0
+        else:
+            await milstd1553_source.write_cmd(data)
 
-    await reset_dut(dut)
+            rx_frame = await axis_sink.recv()
 
-    for x in range(0, 2**8):
-        data = x.to_bytes(length = 2, byteorder='little')
+            assert rx_frame.tdata == data, "Input data does not match output"
 
-        tx_frame = AxiStreamFrame(data, tuser=0x4, tx_complete=Event())
-        
-        await Timer(10, units="us")
+            tuser = int(rx_frame.tuser)
 
-        await axis_source.send(tx_frame)
+            assert (tuser & 0b111) == 0b100, "Wrong Sync"
 
-        await RisingEdge(dut.tx_active)
+            assert ((tuser >> 3) & 1) == 0, "4us Delay"
 
-        assert dut.tx_active.value.integer == 1, "Output is not enabled"
+            if delay:
+                await Timer(4, units="us")
 
-        rx_data = await milstd1553_sink.read_cmd()
+            await milstd1553_source.write_data(data)
 
-        assert tx_frame.tdata == rx_data, "Input data does not match output"
+            rx_frame = await axis_sink.recv()
 
-        tx_frame = AxiStreamFrame(data, tuser=0xA, tx_complete=Event())
+            assert rx_frame.tdata == data, "Input data does not match output"
 
-        await axis_source.send(tx_frame)
-        
-        start_time = get_sim_time("us")
+            tuser = int(rx_frame.tuser)
 
-        await RisingEdge(dut.tx_active)
-        
-        end_time = get_sim_time("us")
+            assert (tuser & 0b111) == 0b010, "Wrong Sync"
 
-        delay_time = end_time - start_time
+            if delay:
+                assert ((tuser >> 3) & 1) == 1, "No 4us Delay"
+            else:
+                assert ((tuser >> 3) & 1) == 0, "4us Delay"
 
-        assert delay_time >= 4, "Delay less then 4 us"
-        
-        assert dut.tx_active.value.integer == 1, "Output is not enabled"
 
-        rx_data = await milstd1553_sink.read_data()
+    await RisingEdge(dut.aclk)
 
-        assert tx_frame.tdata == rx_data, "Input data does not match output"
+    if tx:
+        await ReadOnly()
 
+        assert int(tready.value) == 1, "Input is not ready"
+    else:
+        assert milstd1553_source.empty(), "Buffer NOT empty"
 
-    await RisingEdge(dut.aclk)
+# Function: increment test tx
+# Coroutine that is identified as a test routine. This routine tests by sending 16 sorted random values
+# (all 256 in order with FULL_REGRESSION) as a command and then as data, no delay between the two is inserted by the core.
+#
+# Parameters:
+#   dut - Device under test passed from cocotb.
+@cocotb.test()
+async def increment_test_tx(dut):
+    await _run_increment(dut, tx=True, delay=False)
 
-    assert dut.s_axis_tready.value.integer == 1, "Input is not ready"
+# Function: increment test rx
+# Coroutine that is identified as a test routine. This routine tests by sending 16 sorted random values
+# (all 256 in order with FULL_REGRESSION) as a command and then as data.
+#
+# Parameters:
+#   dut - Device under test passed from cocotb.
+@cocotb.test()
+async def increment_test_rx(dut):
+    await _run_increment(dut, tx=False, delay=False)
 
 # Function: increment test tx delay
-# Coroutine that is identified as a test routine. This routine tests by sending a incrementing value
-# as a command and then as data.
+# Coroutine that is identified as a test routine. This routine tests by sending 16 sorted random values
+# (all 256 in order with FULL_REGRESSION) as a command and then as data, delay between the two is inserted by the core.
 #
 # Parameters:
 #   dut - Device under test passed from cocotb.
 @cocotb.test()
-async def increment_test_rx_delay(dut):
-
-    start_clock(dut)
-
-    axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "m_axis"), dut.aclk, dut.arstn, False)
-
-    milstd1553_source = MILSTD1553Source(dut.rx_diff, dut.arstn)
-
-    await reset_dut(dut)
-    
-    dut.rx_hold_en.value = 1
-
-    for x in range(0, 2**8):
-        data = x.to_bytes(length = 2, byteorder='little')
-
-        await milstd1553_source.write_cmd(data)
-
-        rx_frame = await axis_sink.recv()
-
-        assert rx_frame.tdata == data, "Input data does not match output"
-
-        user_data = "{:05b}".format(rx_frame.tuser)
-
-        assert user_data[2:] == "100", "Wrong Sync"
-        
-        assert user_data[1] == "0", "4us Delay"
-        
-        await Timer(4, units="us")
-
-        await milstd1553_source.write_data(data)
-
-        rx_frame = await axis_sink.recv()
-
-        assert rx_frame.tdata == data, "Input data does not match output"
-
-        user_data = "{:05b}".format(rx_frame.tuser)
-
-        assert user_data[2:] == "010", "Wrong Sync"
-        
-        assert user_data[1] == "1", "No 4us Delay"
-
-
-    await RisingEdge(dut.aclk)
-
-    assert milstd1553_source.empty(), "Buffer NOT empty"
-
+async def increment_test_tx_delay(dut):
+    await _run_increment(dut, tx=True, delay=True)
 
-# Function: in_reset
-# Coroutine that is identified as a test routine. This routine tests if device stays
-# in unready state when in reset.
+# Function: increment test rx delay
+# Coroutine that is identified as a test routine. This routine tests by sending 16 sorted random values
+# (all 256 in order with FULL_REGRESSION) as a command and then as data, with a 4us delay between the two.
 #
 # Parameters:
 #   dut - Device under test passed from cocotb.
 @cocotb.test()
-async def in_reset(dut):
-
-    start_clock(dut)
-
-    dut.s_axis_tvalid.value = 0
-
-    dut.arstn.value = 0
-
-    await Timer(10, units="ns")
+async def increment_test_rx_delay(dut):
+    await _run_increment(dut, tx=False, delay=True)
 
-    assert dut.s_axis_tready.value.integer == 0, "tready is 1!"
 
-# Function: no_clock
+# Function: reset_behaviors
 # Coroutine that is identified as a test routine. This routine tests if no ready when clock is lost
-# and device is left in reset.
+# and device is left in reset, then if device stays in unready state when in reset with the clock running.
 #
 # Parameters:
 #   dut - Device under test passed from cocotb.
 @cocotb.test()
-async def no_clock(dut):
+async def reset_behaviors(dut):
+
+    dut.aclk_en.value = 0
 
     dut.s_axis_tvalid.value = 0
 
@@ -325,4 +299,10 @@ async def no_clock(dut):
 
     await Timer(5, units="ns")
 
-    assert dut.s_axis_tready.value.integer == 0, "tready is 1!"
+    assert int(dut.s_axis_tready.value) == 0, "tready is 1 with no clock!"
+
+    start_clock(dut)
+
+    await Timer(10, units="ns")
+
+    assert int(dut.s_axis_tready.value) == 0, "tready is 1 in reset!"
@@ -44,7 +44,8 @@
  *
  * Ports:
  *
- *   aclk           - Clock for AXIS
+ *   aclk_en        - Enable the internal aclk generator (active high).
+ *   aclk           - Clock for AXIS, generated from CLOCK_SPEED.
  *   arstn          - Negative reset for AXIS
  *   parity_err     - Indicates error with parity check (active high)
  *   frame_err      - Indicates the diff line went to no diff before data catpure finished.
@@ -97,7 +98,8 @@ module tb_cocotb #(
     parameter TX_BAUD_DELAY = 0
   ) 
   (
-    input   wire         aclk,
+    input   wire         aclk_en,
+    output  reg          aclk,
     input   wire         arstn,
     output  wire         parity_err,
     output  wire         frame_err,
@@ -122,6 +124,15 @@ module tb_cocotb #(
     #1;
   end
   
+  // half period of aclk in ns, matches the 1ns timescale. Delays round to the 100ps precision.
+  // start_clock in tb_cocotb.py only reports an integer truncated period, so treat that value as approximate.
+  localparam real CLOCK_HALF_PERIOD_NS = 500000000.0 / CLOCK_SPEED;
+  
+  // clock generator, keeps aclk toggles out of cocotb. Held low till enabled.
+  initial aclk = 1'b0;
+  
+  always #(CLOCK_HALF_PERIOD_NS) aclk = (aclk_en === 1'b1 ? ~aclk : 1'b0);
+  
   //Group: Instantiated Modules
 
   /*